@@ -12,56 +12,56 @@ import asyncio
 from grok_client import GrokClient, Message
 
 async def main():
-    # Initialize client
-    client = GrokClient()
-
-    # Start a conversation about Python programming
-    messages = [
-        Message(role="user", content="What is Python?")
-    ]
+    # Initialize client; leaving the block disconnects it from Chrome
+    async with GrokClient() as client:
+        # Start a conversation about Python programming
+        messages = [
+            Message(role="user", content="What is Python?")
+        ]
     
-    # Get first response (start new chat)
-    response = await client.chat_completion_async(messages, new_chat=True)
-    print("\nQuestion: What is Python?")
-    print("Response:", response.content)
+        # Get first response (start new chat)
+        response = await client.chat_completion_async(messages, new_chat=True)
+        print("\nQuestion: What is Python?")
+        print("Response:", response.content)
 
-    # Add the response to our conversation and ask a follow-up
-    messages.extend([
-        Message(role="assistant", content=response.content),
-        Message(role="user", content="What makes it different from other programming languages?")
-    ])
+        # Add the response to our conversation and ask a follow-up
+        messages.extend([
+            Message(role="assistant", content=response.content),
+            Message(role="user", content="What makes it different from other programming languages?")
+        ])
     
-    # Get second response (continue in same chat)
-    response = await client.chat_completion_async(messages, new_chat=False)
-    print("\nQuestion: What makes it different from other programming languages?")
-    print("Response:", response.content)
+        # Get second response (continue in same chat)
+        response = await client.chat_completion_async(messages, new_chat=False)
+        print("\nQuestion: What makes it different from other programming languages?")
+        print("Response:", response.content)
 
-    # Continue the conversation about Python features
-    messages.extend([
-        Message(role="assistant", content=response.content),
-        Message(role="user", content="Can you give me an example of Python's simplicity?")
-    ])
+        # Continue the conversation about Python features
+        messages.extend([
+            Message(role="assistant", content=response.content),
+            Message(role="user", content="Can you give me an example of Python's simplicity?")
+        ])
     
-    # Get third response (continue in same chat)
-    response = await client.chat_completion_async(messages, new_chat=False)
-    print("\nQuestion: Can you give me an example of Python's simplicity?")
-    print("Response:", response.content)
+        # Get third response (continue in same chat)
+        response = await client.chat_completion_async(messages, new_chat=False)
+        print("\nQuestion: Can you give me an example of Python's simplicity?")
+        print("Response:", response.content)
 
-    # Ask about practical applications
-    messages.extend([
-        Message(role="assistant", content=response.content),
-        Message(role="user", content="What are some real-world applications built with Python?")
-    ])
+        # Ask about practical applications
+        messages.extend([
+            Message(role="assistant", content=response.content),
+            Message(role="user", content="What are some real-world applications built with Python?")
+        ])
     
-    # Get final response (continue in same chat)
-    response = await client.chat_completion_async(messages, new_chat=False)
-    print("\nQuestion: What are some real-world applications built with Python?")
-    print("Response:", response.content)
+        # Get final response (continue in same chat)
+        response = await client.chat_completion_async(messages, new_chat=False)
+        print("\nQuestion: What are some real-world applications built with Python?")
+        print("Response:", response.content)
+
+        # Print the entire conversation history
+        print("\nFull conversation history:")
+        for msg in messages:
+            print(f"\n{msg.role.upper()}: {msg.content}")
 
-    # Print the entire conversation history
-    print("\nFull conversation history:")
-    for msg in messages:
-        print(f"\n{msg.role.upper()}: {msg.content}")
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -5,180 +5,283 @@ Connects to an existing Chrome instance with remote debugging enabled.
 
 Usage:
     python grok_chat.py --port 9222 --message "Your message here" [--new-chat]
+
+chat_with_grok can also be imported and awaited directly, optionally with an
+already connected browser so the CDP connection is reused across messages.
 """
 
 import asyncio
 import argparse
+import logging
 import sys
+import weakref
 from playwright.async_api import async_playwright, TimeoutError
 
+logger = logging.getLogger(__name__)
+
 # Constants
 SELECTOR_TIMEOUT = 30000  # 30 seconds
 RESPONSE_TIMEOUT = 60000  # 60 seconds
-STABLE_CHECK_INTERVAL = 2  # seconds
-MAX_STABLE_CHECKS = 5
-MAX_RETRIES = 3
+STABLE_MS = 10000  # response is complete once unchanged for this long
+POLL_INTERVAL_MS = 250
+MAX_RESPONSE_MS = 600000  # 10 minutes; upper bound for a response to finish streaming
+MIN_GAP_MS = 2000  # lower bound for the observed gap between content changes
+GAP_FACTOR = 3  # once the cadence is known, complete after this many quiet gaps
+
+# Selectors for the Grok chat UI
+NEW_CHAT_BUTTON_SELECTOR = 'a[href="/chat"]'
+INPUT_FIELD_SELECTOR = 'textarea.w-full'
+SEND_BUTTON_SELECTOR = 'button[type="submit"]'
+MESSAGE_ROW_SELECTOR = '.message-row'
+
+# Keeps window.__grokLastRow pointing at the latest message row, rescanning the
+# document only when a message row is added or the cached one is removed, and
+# records in window.__grokLastMutation when that row last changed.
+# STOP_TRACKING_SCRIPT disconnects it once the response has been captured.
+TRACK_LAST_ROW_SCRIPT = """
+rowSelector => {
+    if (window.__grokRowObserver) return;
+    const refresh = () => {
+        const rows = document.querySelectorAll(rowSelector);
+        window.__grokLastRow = rows[rows.length - 1];
+        window.__grokLastMutation = Date.now();
+    };
+    refresh();
+    window.__grokRowObserver = new MutationObserver(mutations => {
+        const row = window.__grokLastRow;
+        if (row && !row.isConnected) return refresh();
+        for (const mutation of mutations) {
+            if (row && row.contains(mutation.target)) window.__grokLastMutation = Date.now();
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType === Node.ELEMENT_NODE &&
+                    (node.matches(rowSelector) || node.querySelector(rowSelector))) {
+                    return refresh();
+                }
+            }
+        }
+    });
+    window.__grokRowObserver.observe(document.body, {childList: true, characterData: true, subtree: true});
+}
+"""
+
+# Returns the text of the latest message row, paragraphs joined by blank lines
+CONTENT_SCRIPT = """
+() => {
+    const lastRow = window.__grokLastRow;
+    if (!lastRow) return '';
+
+    const paragraphs = Array.from(lastRow.querySelectorAll('p.break-words'));
+    const content = paragraphs
+        .map(p => p.textContent.trim())
+        .filter(text => text.length > 0)
+        .join('\\n\\n');
+    return content;
+}
+"""
+
+# Predicate for wait_for_function that resolves once the response has content.
+# It also resets the state STABLE_CONTENT_SCRIPT uses to track changes.
+CONTENT_READY_SCRIPT = """
+rowSelector => {
+    (%s)(rowSelector);
+    window.__grokGetContent = %s;
+    window.__grokLastContent = null;
+    window.__grokMaxGap = 0;
+    window.__grokGaps = 0;
+    return window.__grokGetContent().length > 0;
+}
+""" % (TRACK_LAST_ROW_SCRIPT.strip(), CONTENT_SCRIPT.strip())
+
+# Predicate for wait_for_function that resolves with {content} once the response
+# text has stopped changing, so the whole stability check runs in the page. The
+# content is empty if the response disappeared (e.g. replaced by an error).
+# Change times come from the row observer rather than the polling ticks. After
+# two gaps between changes have been seen, the quiet period needed is
+# gapFactor times the longest gap (at least minGapMs), capped at stableMs.
+STABLE_CONTENT_SCRIPT = """
+({stableMs, minGapMs, gapFactor}) => {
+    const content = window.__grokGetContent();
+    const changedAt = window.__grokLastMutation;
+    if (content !== window.__grokLastContent) {
+        if (window.__grokLastContent !== null) {
+            window.__grokMaxGap = Math.max(window.__grokMaxGap, changedAt - window.__grokLastChange);
+            window.__grokGaps += 1;
+        }
+        window.__grokLastContent = content;
+        window.__grokLastChange = changedAt;
+        return false;
+    }
+    const quietMs = window.__grokGaps >= 2
+        ? Math.min(stableMs, gapFactor * Math.max(window.__grokMaxGap, minGapMs))
+        : stableMs;
+    return Date.now() - changedAt >= quietMs && {content};
+}
+"""
+
+STOP_TRACKING_SCRIPT = """
+() => {
+    if (window.__grokRowObserver) window.__grokRowObserver.disconnect();
+    window.__grokRowObserver = null;
+    window.__grokLastRow = null;
+}
+"""
+
+# Weak reference to the Grok tab used by the last call, so later calls in the
+# same process don't have to scan every open tab again
+_GROK_PAGE = None
+
+class GrokChatError(RuntimeError):
+    """Raised when a message could not be sent or no response was captured."""
+
+async def connect_to_chrome(playwright, debug_port: int):
+    """Connect to the Chrome instance listening on the given debugging port."""
+    logger.info("Connecting to Chrome on port %d...", debug_port)
+    return await playwright.chromium.connect_over_cdp(f"http://localhost:{debug_port}")
+
+async def chat_with_grok(debug_port: int, message: str, new_chat: bool = False, browser=None) -> dict:
+    """
+    Send a message to Grok and return its response.
+
+    Args:
+        debug_port: Chrome remote debugging port, used when no browser is given
+        message: Message to send to Grok
+        new_chat: Whether to start a new chat instead of continuing the current one
+        browser: Browser already connected with connect_to_chrome to reuse
+
+    Returns:
+        Dict with the text of Grok's response under "content"
+
+    Raises:
+        GrokChatError: If the message could not be sent or no response was captured
+    """
+    if browser is None:
+        async with async_playwright() as p:
+            browser = await connect_to_chrome(p, debug_port)
+            return await _chat(browser, message, new_chat)
+    # Don't close the browser since it's user's instance
+    return await _chat(browser, message, new_chat)
 
-async def chat_with_grok(debug_port: int, message: str, new_chat: bool = False):
-    async with async_playwright() as p:
+async def _chat(browser, message: str, new_chat: bool) -> dict:
+    global _GROK_PAGE
+    # Get the first context
+    if not browser.contexts:
+        raise GrokChatError("No browser context found. Make sure Chrome is running.")
+    context = browser.contexts[0]
+    
+    # Find or create Grok tab
+    # The cached tab only counts if it is still open, in this context and on grok.com
+    grok_page = _GROK_PAGE() if _GROK_PAGE else None
+    if (grok_page is None or grok_page.is_closed() or grok_page.context is not context
+            or "grok.com" not in grok_page.url):
+        grok_page = next((page for page in context.pages if "grok.com" in page.url), None)
+        if grok_page:
+            logger.info("Found existing Grok tab: %s", grok_page.url)
+    
+    if not grok_page:
+        logger.info("Creating new Grok tab...")
+        grok_page = await context.new_page()
+        await grok_page.goto("https://grok.com")
+        new_chat = True  # Force new chat if we created a new tab
+    _GROK_PAGE = weakref.ref(grok_page)
+    
+    # Make sure we're on grok.com
+    if not "grok.com" in grok_page.url:
+        logger.info("Navigating to grok.com...")
+        await grok_page.goto("https://grok.com")
+        new_chat = True  # Force new chat if we had to navigate
+    
+    # Start new chat if requested
+    if new_chat:
+        logger.info("Starting new chat...")
         try:
-            # Connect to existing Chrome instance
-            print(f"Connecting to Chrome on port {debug_port}...", file=sys.stderr)
-            browser = await p.chromium.connect_over_cdp(f"http://localhost:{debug_port}")
-            
-            # Get the first context
-            context = browser.contexts[0]
-            if not context:
-                print("No browser context found. Make sure Chrome is running.", file=sys.stderr)
-                return
-            
-            # Find or create Grok tab
-            grok_page = None
-            for page in context.pages:
-                try:
-                    if "grok.com" in page.url:
-                        grok_page = page
-                        print(f"Found existing Grok tab: {page.url}", file=sys.stderr)
-                        break
-                except:
-                    continue
-            
-            if not grok_page:
-                print("Creating new Grok tab...", file=sys.stderr)
-                grok_page = await context.new_page()
-                await grok_page.goto("https://grok.com")
-                new_chat = True  # Force new chat if we created a new tab
-            
-            # Make sure we're on grok.com
-            if not "grok.com" in grok_page.url:
-                print("Navigating to grok.com...", file=sys.stderr)
-                await grok_page.goto("https://grok.com")
-                await asyncio.sleep(2)
-                new_chat = True  # Force new chat if we had to navigate
-            
-            # Start new chat if requested
-            if new_chat:
-                print("Starting new chat...", file=sys.stderr)
-                try:
-                    new_chat_button = await grok_page.wait_for_selector('a[href="/chat"]', timeout=SELECTOR_TIMEOUT)
-                    if new_chat_button:
-                        await new_chat_button.click()
-                        await asyncio.sleep(2)
-                except TimeoutError:
-                    print("Could not find new chat button. Assuming we're already in a chat.", file=sys.stderr)
-            else:
-                print("Continuing existing chat...", file=sys.stderr)
-            
-            # Find and fill input field
-            print(f"Sending message: {message}", file=sys.stderr)
-            try:
-                input_field = await grok_page.wait_for_selector('textarea.w-full', timeout=SELECTOR_TIMEOUT)
-                await input_field.fill(message)
-            except TimeoutError:
-                print("Could not find input field. Make sure you're logged into Grok.", file=sys.stderr)
-                sys.exit(1)
-            
-            # Send message
-            try:
-                send_button = await grok_page.wait_for_selector('button[type="submit"]', timeout=SELECTOR_TIMEOUT)
-                await send_button.click()
-            except TimeoutError:
-                print("Could not find send button.", file=sys.stderr)
-                sys.exit(1)
-            
-            # Wait for and capture response
-            print("\nWaiting for response...", file=sys.stderr)
-            
+            new_chat_button = await grok_page.wait_for_selector(NEW_CHAT_BUTTON_SELECTOR, timeout=SELECTOR_TIMEOUT)
+        except TimeoutError:
+            new_chat_button = None
+            logger.warning("Could not find new chat button. Assuming we're already in a chat.")
+        if new_chat_button:
+            await new_chat_button.click()
+            # The new chat is ready once the old conversation's messages are gone
             try:
-                # Wait for message row to appear
-                print("Waiting for message row...", file=sys.stderr)
-                await grok_page.wait_for_selector('.message-row', timeout=RESPONSE_TIMEOUT)
-                
-                # Wait for actual content
-                print("Waiting for content...", file=sys.stderr)
-                await grok_page.wait_for_function(
-                    """
-                    () => {
-                        const rows = document.querySelectorAll('.message-row');
-                        const lastRow = rows[rows.length - 1];
-                        if (!lastRow) return false;
-                        const paragraphs = lastRow.querySelectorAll('p.break-words');
-                        return paragraphs.length > 0 && Array.from(paragraphs).some(p => p.textContent.trim().length > 0);
-                    }
-                    """,
-                    timeout=RESPONSE_TIMEOUT
-                )
+                await grok_page.wait_for_selector(MESSAGE_ROW_SELECTOR, state='detached', timeout=SELECTOR_TIMEOUT)
             except TimeoutError:
-                print("Timed out waiting for response.", file=sys.stderr)
-                sys.exit(1)
-            
-            # Monitor response until complete
-            last_content = ""
-            stable_count = 0
-            retry_count = 0
-            
-            while stable_count < MAX_STABLE_CHECKS and retry_count < MAX_RETRIES:
-                # Get current content
-                content = await grok_page.evaluate(
-                    """
-                    () => {
-                        const rows = document.querySelectorAll('.message-row');
-                        const lastRow = rows[rows.length - 1];
-                        if (!lastRow) return '';
-                        
-                        const paragraphs = Array.from(lastRow.querySelectorAll('p.break-words'));
-                        const content = paragraphs
-                            .map(p => p.textContent.trim())
-                            .filter(text => text.length > 0)
-                            .join('\\n\\n');
-                        console.log('Current content:', content);  // Debug log
-                        return content;
-                    }
-                    """
-                )
-                
-                if not content:
-                    retry_count += 1
-                    print(f"No content found, retry {retry_count}/{MAX_RETRIES}", file=sys.stderr)
-                    await asyncio.sleep(STABLE_CHECK_INTERVAL)
-                    continue
-                
-                if content == last_content:
-                    stable_count += 1
-                    print(f"Response stable for {stable_count}/{MAX_STABLE_CHECKS} checks (length: {len(content)})", file=sys.stderr)
-                else:
-                    print(f"Response growing: {len(content)} chars", file=sys.stderr)
-                    stable_count = 0
-                    last_content = content
-                
-                await asyncio.sleep(STABLE_CHECK_INTERVAL)
-            
-            # Print final response
-            if last_content:
-                # Print to stdout for capturing by the client
-                print("-" * 50)
-                print(last_content)
-                print("-" * 50)
-            else:
-                print("No response captured", file=sys.stderr)
-                sys.exit(1)
-                
+                raise GrokChatError("Clicked new chat, but the previous conversation's messages did not clear.")
+    else:
+        logger.info("Continuing existing chat...")
+    
+    # Find and fill input field
+    logger.info("Sending message: %s", message)
+    try:
+        input_field = await grok_page.wait_for_selector(INPUT_FIELD_SELECTOR, timeout=SELECTOR_TIMEOUT)
+        await input_field.fill(message)
+    except TimeoutError:
+        raise GrokChatError("Could not find input field. Make sure you're logged into Grok.")
+    
+    # Send message
+    try:
+        send_button = await grok_page.wait_for_selector(SEND_BUTTON_SELECTOR, timeout=SELECTOR_TIMEOUT)
+        await send_button.click()
+    except TimeoutError:
+        raise GrokChatError("Could not find send button.")
+    
+    # Wait for and capture response
+    logger.info("Waiting for response...")
+    
+    try:
+        try:
+            # Wait for message row to appear
+            logger.info("Waiting for message row...")
+            await grok_page.wait_for_selector(MESSAGE_ROW_SELECTOR, timeout=RESPONSE_TIMEOUT)
+        
+            # Wait for actual content
+            logger.info("Waiting for content...")
+            await grok_page.wait_for_function(CONTENT_READY_SCRIPT, arg=MESSAGE_ROW_SELECTOR, timeout=RESPONSE_TIMEOUT)
+        except TimeoutError:
+            raise GrokChatError("Timed out waiting for response.")
+    
+        # Monitor response until it stops changing. Long responses can keep
+        # streaming well past RESPONSE_TIMEOUT, so this has its own larger cap.
+        logger.info("Waiting for response to complete...")
+        try:
+            stable_content = await grok_page.wait_for_function(
+                STABLE_CONTENT_SCRIPT,
+                arg={"stableMs": STABLE_MS, "minGapMs": MIN_GAP_MS, "gapFactor": GAP_FACTOR},
+                polling=POLL_INTERVAL_MS,
+                timeout=MAX_RESPONSE_MS
+            )
+        except TimeoutError:
+            raise GrokChatError("Timed out waiting for response to complete.")
+        last_content = (await stable_content.json_value())["content"]
+    finally:
+        # Don't leave the row observer running in the user's tab, but don't let
+        # a failed cleanup (e.g. the tab navigated away) replace the result
+        try:
+            if not grok_page.is_closed():
+                await grok_page.evaluate(STOP_TRACKING_SCRIPT)
         except Exception as e:
-            print(f"Error: {e}", file=sys.stderr)
-            sys.exit(1)
-            
-        finally:
-            # Don't close the browser since it's user's instance
-            pass
+            logger.warning("Could not stop tracking message rows: %s", e)
+    
+    if not last_content:
+        raise GrokChatError("No response captured")
+    logger.info("Response stable (length: %d)", len(last_content))
+    return {"content": last_content}
+
+_PARSER = argparse.ArgumentParser(description="Chat with Grok using an existing Chrome instance")
+_PARSER.add_argument("--port", type=int, default=9222, help="Chrome remote debugging port")
+_PARSER.add_argument("--message", type=str, required=True, help="Message to send to Grok")
+_PARSER.add_argument("--new-chat", action="store_true", help="Start a new chat instead of continuing existing one")
 
 def main():
-    parser = argparse.ArgumentParser(description="Chat with Grok using an existing Chrome instance")
-    parser.add_argument("--port", type=int, default=9222, help="Chrome remote debugging port")
-    parser.add_argument("--message", type=str, required=True, help="Message to send to Grok")
-    parser.add_argument("--new-chat", action="store_true", help="Start a new chat instead of continuing existing one")
-    args = parser.parse_args()
+    args = _PARSER.parse_args()
+    
+    # Progress goes to stderr so stdout only carries the response
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    try:
+        response = asyncio.run(chat_with_grok(args.port, args.message, args.new_chat))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
     
-    asyncio.run(chat_with_grok(args.port, args.message, args.new_chat))
+    print(response["content"])
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
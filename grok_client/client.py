@@ -1,10 +1,12 @@
 from typing import List, Optional
 import asyncio
-import subprocess
-import os
 import logging
 from dataclasses import dataclass
 
+from playwright.async_api import async_playwright
+
+from grok_chat import chat_with_grok, connect_to_chrome
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,67 +27,115 @@ class GrokResponse:
 class GrokClient:
     def __init__(self, debug_port: int = 9222):
         self.debug_port = debug_port
-        self._script_path = os.path.join(os.path.dirname(__file__), '..', 'grok_chat.py')
-        if not os.path.exists(self._script_path):
-            raise FileNotFoundError(f"Could not find grok_chat.py at {self._script_path}")
-        logger.info(f"Using grok_chat.py at: {self._script_path}")
+        self._playwright = None
+        self._browser = None
+        # Event loop the connection belongs to, and the lock guarding its setup
+        self._loop = None
+        self._lock = None
+        # Event loop reused by the synchronous methods so the CDP connection
+        # made on one call is still usable on the next
+        self._sync_loop = None
+
+    def _run_sync(self, coro):
+        """Run a coroutine to completion on the client's own event loop."""
+        if self._sync_loop is None or self._sync_loop.is_closed():
+            self._sync_loop = asyncio.new_event_loop()
+        return self._sync_loop.run_until_complete(coro)
+
+    async def _get_browser(self):
+        """Return the CDP connection to Chrome, connecting on first use."""
+        loop = asyncio.get_running_loop()
+        # Playwright connections are bound to the event loop that created them
+        # and can only be stopped from it, so refuse rather than orphan one
+        # unless that loop is already gone (e.g. after asyncio.run returned)
+        if self._loop is not None and self._loop is not loop:
+            if self._loop.is_closed():
+                self._forget_closed_loop_connection()
+            elif self._loop is self._sync_loop:
+                raise RuntimeError(
+                    "GrokClient is connected to Chrome through its synchronous methods; "
+                    "call close() before using it from an event loop"
+                )
+            else:
+                raise RuntimeError(
+                    "GrokClient is connected to Chrome from another event loop; "
+                    "call close_async() on that loop before using it from a new one"
+                )
+        if self._lock is None:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is not None:
+                    await self._playwright.stop()
+                    self._playwright = None
+                self._playwright = await async_playwright().start()
+                self._browser = await connect_to_chrome(self._playwright, self.debug_port)
+        return self._browser
 
     async def _run_grok_chat(self, message: str, new_chat: bool = False) -> str:
-        """Run grok_chat.py with the given message."""
-        logger.info(f"Running grok_chat.py with message: {message} (new_chat: {new_chat})")
+        """Send the message to Grok through grok_chat.chat_with_grok."""
+        logger.info("Running grok_chat with message: %s (new_chat: %s)", message, new_chat)
         
         try:
-            cmd = [
-                'python', self._script_path,
-                '--port', str(self.debug_port),
-                '--message', message
-            ]
-            if new_chat:
-                cmd.append('--new-chat')
-
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            browser = await self._get_browser()
+            result = await chat_with_grok(self.debug_port, message, new_chat, browser=browser)
+            response = result["content"]
+            logger.info("Received response of length: %d", len(response))
+            return response
+        except Exception as e:
+            logger.error("Error running grok_chat: %s", e)
+            raise
+
+    async def close_async(self):
+        """Disconnect from Chrome. The browser itself is left running."""
+        if self._loop is not None and self._loop is not asyncio.get_running_loop():
+            logger.warning(
+                "GrokClient was connected from another event loop; its Playwright "
+                "driver can only be stopped from that loop and is left running"
             )
+        elif self._lock is not None:
+            async with self._lock:
+                if self._playwright is not None:
+                    await self._playwright.stop()
+        self._forget_connection()
 
-            stdout, stderr = await process.communicate()
-            stdout_text = stdout.decode() if stdout else ""
-            stderr_text = stderr.decode() if stderr else ""
-            
-            if stderr_text:
-                logger.warning(f"stderr from grok_chat.py: {stderr_text}")
-            
-            if process.returncode != 0:
-                error_msg = f"grok_chat.py failed with return code {process.returncode}"
-                if stderr_text:
-                    error_msg += f"\nError: {stderr_text}"
-                if stdout_text:
-                    error_msg += f"\nOutput: {stdout_text}"
-                raise RuntimeError(error_msg)
-
-            logger.info("Successfully ran grok_chat.py")
-            
-            # Parse the output to extract Grok's response
-            output = stdout_text
-            try:
-                # Find the response between the marker lines
-                start_marker = "-" * 50 + "\n"
-                end_marker = "\n" + "-" * 50
-                response_start = output.index(start_marker) + len(start_marker)
-                response_end = output.index(end_marker)
-                response = output[response_start:response_end].strip()
-                logger.info(f"Extracted response of length: {len(response)}")
-                return response
-            except ValueError:
-                # If markers not found, log the full output and return it
-                logger.warning("Could not find response markers, returning full output")
-                logger.debug(f"Full output: {output}")
-                return output.strip()
+    def _forget_connection(self):
+        self._playwright = None
+        self._browser = None
+        self._loop = None
+        self._lock = None
 
-        except Exception as e:
-            logger.error(f"Error running grok_chat.py: {str(e)}")
-            raise
+    def _forget_closed_loop_connection(self):
+        logger.warning(
+            "GrokClient was connected from an event loop that is now closed; "
+            "its Playwright driver can no longer be stopped and is left running. "
+            "Use 'async with GrokClient()' or close_async() to disconnect cleanly."
+        )
+        self._forget_connection()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_async()
+
+    def close(self):
+        """Synchronous version of close_async; also closes the client's event loop."""
+        loop = self._loop
+        if loop is not None and loop is not self._sync_loop:
+            # Connected through the async API on a loop the client doesn't own
+            if loop.is_running():
+                logger.warning("GrokClient.close() called from a running event loop; use 'await client.close_async()' instead")
+                return
+            if loop.is_closed():
+                self._forget_closed_loop_connection()
+            else:
+                loop.run_until_complete(self.close_async())
+        if self._sync_loop is not None and not self._sync_loop.is_closed():
+            self._run_sync(self.close_async())
+            self._sync_loop.close()
+        self._sync_loop = None
 
     async def chat_completion_async(
         self, 
@@ -114,7 +164,7 @@ class GrokClient:
                 logger.warning("Received empty response from Grok")
             return GrokResponse(response_text)
         except Exception as e:
-            logger.error(f"Error in chat_completion_async: {str(e)}")
+            logger.error("Error in chat_completion_async: %s", e)
             raise
 
     def chat_completion(
@@ -123,4 +173,4 @@ class GrokClient:
         new_chat: bool = True
     ) -> GrokResponse:
         """Synchronous version of chat_completion_async."""
-        return asyncio.run(self.chat_completion_async(messages, new_chat)) 
\ No newline at end of file
+        return self._run_sync(self.chat_completion_async(messages, new_chat)) 
\ No newline at end of file
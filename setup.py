@@ -4,6 +4,7 @@ setup(
     name="grok-client",
     version="0.1.0",
     packages=find_packages(),
+    py_modules=["grok_chat"],
     install_requires=[
         "playwright>=1.40.0",
     ],